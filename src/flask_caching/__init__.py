@@ -34,8 +34,9 @@ from werkzeug.utils import import_string
 from flask_caching.backends.base import BaseCache
 from flask_caching.backends.simplecache import SimpleCache
 from flask_caching.utils import function_namespace
-from flask_caching.utils import get_arg_default
-from flask_caching.utils import get_arg_names
+from flask_caching.utils import get_arg_default  # noqa: F401
+from flask_caching.utils import get_arg_names  # noqa: F401
+from flask_caching.utils import get_function_parameters
 from flask_caching.utils import get_id
 from flask_caching.utils import make_template_fragment_key  # noqa: F401
 from flask_caching.utils import wants_args
@@ -358,6 +359,8 @@ class Cache:
                              if used cache.
         """
 
+        _forced_update = self._make_forced_update(forced_update)
+
         def decorator(f):
             @functools.wraps(f)
             def decorated_function(*args, **kwargs):
@@ -378,13 +381,8 @@ class Cache:
                         )
 
                     if (
-                        callable(forced_update)
-                        and (
-                            forced_update(*args, **kwargs)
-                            if wants_args(forced_update)
-                            else forced_update()
-                        )
-                        is True
+                        _forced_update is not None
+                        and _forced_update(*args, **kwargs) is True
                     ):
                         rv = None
                         found = False
@@ -412,7 +410,7 @@ class Cache:
                     logger.exception("Exception possibly due to cache backend.")
                     return self._call_fn(f, *args, **kwargs)
                 if found and self.app.debug:
-                    logger.info(f"Cache used for key: {cache_key}")
+                    logger.info("Cache used for key: %s", cache_key)
                 if response_hit_indication:
 
                     def apply_caching(response):
@@ -546,6 +544,9 @@ class Cache:
     ) -> Union[Tuple[str, str], Tuple[str, None]]:
         """Updates the hash version associated with a memoized function or
         method.
+
+        ``forced_update`` is called with ``args`` and ``kwargs``, see
+        :meth:`_make_forced_update`.
         """
         fname, instance_fname = function_namespace(f, args=args)
         version_key = self._memvname(fname)
@@ -570,12 +571,7 @@ class Cache:
 
         if (
             callable(forced_update)
-            and (
-                forced_update(*(args or ()), **(kwargs or {}))
-                if wants_args(forced_update)
-                else forced_update()
-            )
-            is True
+            and forced_update(*(args or ()), **(kwargs or {})) is True
         ):
             # Mark key as dirty to update its TTL
             dirty = True
@@ -612,15 +608,21 @@ class Cache:
         args_to_ignore: Optional[Any] = None,
     ) -> Callable:
         """Function used to create the cache_key for memoized functions."""
+        _forced_update = self._make_forced_update(forced_update)
+
+        #: Hasher already fed with the last seen function name. Copying it is
+        #: cheaper than creating a new one and hashing the name again.
+        template_hasher: Tuple[Optional[str], Any] = (None, None)
 
         def make_cache_key(f, *args, **kwargs):
+            nonlocal template_hasher
             _timeout = getattr(timeout, "cache_timeout", timeout)
             fname, version_data = self._memoize_version(
                 f,
                 args=args,
                 kwargs=kwargs,
                 timeout=_timeout,
-                forced_update=forced_update,
+                forced_update=_forced_update,
                 args_to_ignore=args_to_ignore,
             )
 
@@ -635,10 +637,19 @@ class Cache:
             else:
                 keyargs, keykwargs = args, kwargs
 
-            updated = f"{altfname}{keyargs}{keykwargs}"
+            template_name, template = template_hasher
+            if template_name != altfname:
+                template = hash_method()
+                template.update(altfname.encode("utf-8"))
+                template_hasher = (altfname, template)
 
-            cache_key = hash_method()
-            cache_key.update(updated.encode("utf-8"))
+            if hasattr(template, "copy"):
+                cache_key = template.copy()
+            else:
+                # Hashers which can't be copied are fed the name every time.
+                cache_key = hash_method()
+                cache_key.update(altfname.encode("utf-8"))
+            cache_key.update(f"{keyargs}{keykwargs}".encode("utf-8"))
 
             # Use the source code if source_check is True and update the
             # cache_key with the function's source.
@@ -666,11 +677,19 @@ class Cache:
         # If the function uses VAR_KEYWORD type of parameters,
         # we need to pass these further
         kw_keys_remaining = [key for key in kwargs.keys() if key not in args_to_ignore]
-        arg_names = get_arg_names(f)
+        # Inspect the signature only once instead of once per argument.
+        parameters = get_function_parameters(f)
+        arg_names = [
+            parameter.name
+            for parameter in parameters
+            if parameter.kind == parameter.POSITIONAL_OR_KEYWORD
+        ]
         args_len = len(arg_names)
 
         for i in range(args_len):
-            arg_default = get_arg_default(f, i)
+            arg_default = parameters[i].default
+            if arg_default is inspect.Parameter.empty:
+                arg_default = None
             if arg_names[i] in args_to_ignore:
                 arg = None
                 arg_num += 1
@@ -745,6 +764,21 @@ class Cache:
 
         return bypass_cache
 
+    def _make_forced_update(
+        self, forced_update: Optional[Union[bool, Callable]]
+    ) -> Optional[Callable]:
+        """Resolves ``forced_update`` once at decoration time into a callable
+        that accepts the arguments of the decorated function, or ``None`` if
+        no forced update was requested.
+        """
+        if not callable(forced_update):
+            return None
+
+        if wants_args(forced_update):
+            return forced_update
+
+        return lambda *args, **kwargs: forced_update()
+
     def memoize(
         self,
         timeout: Optional[int] = None,
@@ -846,6 +880,8 @@ class Cache:
             params ``args_to_ignore``
         """
 
+        _forced_update = self._make_forced_update(forced_update)
+
         def memoize(f):
             @functools.wraps(f)
             def decorated_function(*args, **kwargs):
@@ -861,13 +897,8 @@ class Cache:
                     cache_key = decorated_function.make_cache_key(f, *args, **kwargs)
 
                     if (
-                        callable(forced_update)
-                        and (
-                            forced_update(*args, **kwargs)
-                            if wants_args(forced_update)
-                            else forced_update()
-                        )
-                        is True
+                        _forced_update is not None
+                        and _forced_update(*args, **kwargs) is True
                     ):
                         rv = None
                         found = False
@@ -10,14 +10,95 @@
 """
 
 import hashlib
+import io
 import logging
+import os
+import pickle
+import struct
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from time import time
 
 from cachelib import FileSystemCache as CachelibFileSystemCache
 
 from flask_caching.backends.base import BaseCache
 
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
 logger = logging.getLogger(__name__)
 
+#: Files have to be opened in binary mode on Windows.
+_O_BINARY = getattr(os, "O_BINARY", 0)
+
+#: Whether file times can be updated through an open file descriptor.
+_UTIME_FD = os.utime in os.supports_fd
+
+#: Files created by :func:`tempfile.mkstemp` always have this mode.
+_MKSTEMP_MODE = 0o600
+
+#: Marks a value serialized with msgpack. Pickles written by this cache
+#: always start with the PROTO opcode (``b"\x80"``), so the two can't be
+#: confused and existing cache files stay readable.
+_MSGPACK_TAG = b"M"
+
+#: Cache files up to this size are read with a single system call. Larger
+#: ones are only read completely once their expiry has been checked.
+_READ_SIZE = 64 * 1024
+
+#: Removing files releases the GIL, so when this many or more files are
+#: removed at once, the removals are spread over a few threads.
+_PARALLEL_REMOVE_MIN = 128
+_REMOVE_WORKERS = 8
+
+#: Upper bound for the number of buffers handed to a single ``os.writev``
+#: call. POSIX guarantees at least 16, Linux and macOS allow 1024.
+_IOV_MAX = 1024
+
+
+class _OutOfBandBuffers(tuple):
+    """Sizes of the out-of-band pickle buffers that follow this marker in a
+    cache file. The pickled value itself is stored after the buffers.
+    """
+
+
+def _read_rest(fd, data):
+    """Read the remainder of a file of which ``data`` has been read already."""
+    parts = [data]
+    remaining = os.fstat(fd).st_size - len(data)
+    while remaining > 0:
+        chunk = os.read(fd, remaining)
+        if not chunk:
+            break
+        parts.append(chunk)
+        remaining -= len(chunk)
+    return b"".join(parts)
+
+
+def _write_all(fd, chunks):
+    """Write all ``chunks`` to ``fd``, gathering them into as few system
+    calls as possible.
+    """
+    views = [memoryview(chunk) for chunk in chunks]
+    if not hasattr(os, "writev"):
+        for view in views:
+            while view:
+                view = view[os.write(fd, view) :]
+        return
+
+    idx = 0
+    while idx < len(views):
+        written = os.writev(fd, views[idx : idx + _IOV_MAX])
+        # Skip the buffers which were written completely and continue with
+        # the remainder of a partially written one.
+        while idx < len(views) and written >= len(views[idx]):
+            written -= len(views[idx])
+            idx += 1
+        if written:
+            views[idx] = views[idx][written:]
+
 
 class FileSystemCache(BaseCache, CachelibFileSystemCache):
     """A cache that stores the items on the file system.  This cache depends
@@ -25,23 +106,45 @@ class FileSystemCache(BaseCache, CachelibFileSystemCache):
     nobody but this cache stores files there or otherwise the cache will
     randomly delete files therein.
 
+    Values are pickled with protocol 5. Objects supporting out-of-band
+    buffers (like NumPy arrays) are written to disk straight from their
+    memory without being copied into the pickle stream first.
+
     :param cache_dir: the directory where cache files are stored.
     :param threshold: the maximum number of items the cache stores before
-                      it starts deleting some. A threshold value of 0
-                      indicates no threshold.
+                      it starts deleting some. Expired items are deleted
+                      first, then the least recently used ones. A threshold
+                      value of 0 indicates no threshold.
     :param default_timeout: the default timeout that is used if no timeout is
                             specified on :meth:`~BaseCache.set`. A timeout of
                             0 indicates that the cache never expires.
     :param mode: the file mode wanted for the cache files, default 0600
     :param hash_method: Default hashlib.md5. The hash method used to
-                        generate the filename for cached results.
+                        generate the filename for cached results. Other
+                        hashlib constructors like ``hashlib.blake2b`` can
+                        be used, entries written with a different method
+                        are not found anymore.
     :param ignore_errors: If set to ``True`` the :meth:`~BaseCache.delete_many`
                           method will ignore any errors that occurred during the
                           deletion process. However, if it is set to ``False``
                           it will stop on the first error. Defaults to
                           ``False``.
+    :param use_msgpack: If set to ``True``, values made up of plain ``dict``,
+                        ``list``, ``str``, ``bytes``, ``int``, ``float``,
+                        ``bool`` and ``None`` objects are stored with
+                        `msgpack`, which is faster than pickle. Every process
+                        sharing the `cache_dir` needs `msgpack` installed to
+                        read them. Defaults to ``False``.
     """
 
+    #: number of file count changes kept in memory before they are merged
+    #: into the count file shared with other processes
+    _fs_count_flush_interval = 64
+
+    #: minimum number of seconds between two updates of a cache file's
+    #: modification time on cache hits, see :meth:`_touch`
+    _touch_interval = 60
+
     def __init__(
         self,
         cache_dir,
@@ -50,9 +153,21 @@ class FileSystemCache(BaseCache, CachelibFileSystemCache):
         mode=0o600,
         hash_method=hashlib.md5,
         ignore_errors=False,
+        use_msgpack=False,
     ):
+        if use_msgpack and msgpack is None:
+            raise RuntimeError("no msgpack module found")
 
         BaseCache.__init__(self, default_timeout=default_timeout)
+        # Joined with the hashed key in _get_filename, which is called for
+        # every operation. Needed before cachelib starts counting the files.
+        self._path_prefix = os.path.join(cache_dir, "")
+        # In-memory file count and the changes not written to disk yet.
+        self._count = 0
+        self._count_delta = 0
+        self._count_updates = 0
+        # Used by _dump, which cachelib calls to write the count file.
+        self.use_msgpack = use_msgpack
         CachelibFileSystemCache.__init__(
             self,
             cache_dir=cache_dir,
@@ -73,4 +188,356 @@ class FileSystemCache(BaseCache, CachelibFileSystemCache):
                 ignore_errors=config["CACHE_IGNORE_ERRORS"],
             )
         )
+        serializer = config.get("CACHE_FILESYSTEM_SERIALIZER")
+        if serializer is not None:
+            if serializer not in ("pickle", "msgpack"):
+                raise ValueError(f"unknown FileSystemCache serializer: {serializer!r}")
+            kwargs["use_msgpack"] = serializer == "msgpack"
         return cls(*args, **kwargs)
+
+    def _dump(self, timeout, value):
+        """Serialize ``value`` into a list of chunks making up a cache file.
+
+        Out-of-band buffers are returned as views on the original memory and
+        are preceded by an :class:`_OutOfBandBuffers` marker holding their
+        sizes, so that :meth:`_load` can read them back before the value.
+        """
+        chunks = [struct.pack("I", timeout)]
+        if self.use_msgpack:
+            # strict_types makes msgpack reject tuples and subclasses of the
+            # builtin types instead of silently converting them, those are
+            # pickled so that they come back unchanged.
+            try:
+                data = msgpack.packb(value, use_bin_type=True, strict_types=True)
+            except (TypeError, ValueError, OverflowError):
+                pass
+            else:
+                chunks.extend((_MSGPACK_TAG, data))
+                return chunks
+
+        buffers = []
+        data = pickle.dumps(value, protocol=5, buffer_callback=buffers.append)
+        if buffers:
+            views = [buffer.raw() for buffer in buffers]
+            marker = _OutOfBandBuffers(view.nbytes for view in views)
+            chunks.append(pickle.dumps(marker, protocol=5))
+            chunks.extend(views)
+        chunks.append(data)
+        return chunks
+
+    def _load(self, data, offset=0):
+        """Deserialize the value stored in ``data`` after ``offset``."""
+        view = memoryview(data)[offset:]
+        if view[:1] == _MSGPACK_TAG:
+            if msgpack is None:
+                raise ValueError("msgpack is required to read this cache file")
+            return msgpack.unpackb(view[1:], raw=False, strict_map_key=False)
+
+        value = self.serializer.loads(view)
+        if type(value) is _OutOfBandBuffers:
+            # Parse the small marker again to find where the buffers start.
+            f = io.BytesIO(data)
+            f.seek(offset)
+            self.serializer.load(f)
+            pos = f.tell()
+            buffers = []
+            for size in value:
+                # Copied, so the buffers are writable like the originals.
+                buffer = bytearray(view[pos - offset : pos - offset + size])
+                if len(buffer) != size:
+                    raise EOFError("Cache file ended inside an out-of-band buffer")
+                buffers.append(buffer)
+                pos += size
+            value = pickle.loads(view[pos - offset :], buffers=buffers)
+        return value
+
+    def _normalize_timeout(self, timeout):
+        # Same as cachelib's version, without the extra call into the base
+        # class on every set().
+        if timeout is None:
+            timeout = self.default_timeout
+        if timeout != 0:
+            timeout = int(time()) + timeout
+        return int(timeout)
+
+    @property
+    def _file_count(self):
+        return self._count
+
+    def _update_count(self, delta=None, value=None):
+        # If we have no threshold, don't count files
+        if self._threshold == 0:
+            return
+        if delta:
+            self._count += delta
+            self._count_delta += delta
+            self._count_updates += 1
+            if self._count_updates < self._fs_count_flush_interval:
+                return
+            # Merge with the changes other processes made in the meantime.
+            value = (self.get(self._fs_count_file) or 0) + self._count_delta
+        self._count = max(value or 0, 0)
+        self._count_delta = 0
+        self._count_updates = 0
+        self.set(self._fs_count_file, self._count, mgmt_element=True)
+
+    def _get_filename(self, key):
+        if not isinstance(key, str):
+            raise TypeError(f"Key must be a string, received type {type(key)}")
+        return self._path_prefix + self._hash_method(key.encode("utf-8")).hexdigest()
+
+    def _list_dir(self):
+        """return a list of (fully qualified) cache filenames"""
+        # Hash the name of the count file once instead of once per entry.
+        count_file = os.path.basename(self._get_filename(self._fs_count_file))
+        with os.scandir(self._path) as entries:
+            return [
+                entry.path
+                for entry in entries
+                if entry.name != count_file
+                and not entry.name.endswith(self._fs_transaction_suffix)
+            ]
+
+    def _read_expiry(self, filename, with_mtime=False):
+        """Read only the expiry header of a cache file. This uses a raw file
+        descriptor, so no buffer is allocated and filled for the value.
+
+        If ``with_mtime`` is set, a tuple of the expiry and the time the file
+        was last used (see :meth:`_touch`) is returned.
+        """
+        fd = self._run_safely(os.open, filename, os.O_RDONLY | _O_BINARY)
+        if fd is None:
+            raise OSError
+        try:
+            expires = struct.unpack("I", os.read(fd, 4))[0]
+            if with_mtime:
+                return expires, os.fstat(fd).st_mtime_ns
+            return expires
+        finally:
+            os.close(fd)
+
+    def _touch(self, fd, filename):
+        """Mark an open cache file as recently used, :meth:`_prune` evicts
+        the least recently used files first. Files marked less than
+        :attr:`_touch_interval` seconds ago are left alone, so frequent hits
+        on the same entry don't write its metadata every time.
+        """
+        try:
+            if time() - os.fstat(fd).st_mtime < self._touch_interval:
+                return
+            os.utime(fd if _UTIME_FD else filename)
+        except OSError:
+            pass
+
+    def _remove_file(self, fname):
+        """Remove a cache file, returns whether it was removed by this call.
+        Errors other than the file being gone already are logged and raised.
+        """
+        try:
+            os.remove(fname)
+        except FileNotFoundError:
+            return False
+        except OSError:
+            logger.warning(
+                "Exception raised while handling cache file '%s'",
+                fname,
+                exc_info=True,
+            )
+            raise
+        return True
+
+    def _discard_file(self, fname):
+        """Like :meth:`_remove_file`, but returns whether the file is gone
+        instead of raising.
+        """
+        try:
+            self._remove_file(fname)
+        except OSError:
+            return False
+        return True
+
+    def _remove_files(self, fnames):
+        """Remove the given cache files and return the number of files that
+        could not be removed.
+        """
+        if len(fnames) < _PARALLEL_REMOVE_MIN:
+            return sum(not self._discard_file(fname) for fname in fnames)
+        with ThreadPoolExecutor(max_workers=_REMOVE_WORKERS) as executor:
+            return sum(not gone for gone in executor.map(self._discard_file, fnames))
+
+    def clear(self):
+        failed = self._remove_files(self._list_dir())
+        self._update_count(value=failed)
+        return not failed
+
+    def _prune(self):
+        if not self._over_threshold():
+            return
+
+        # Read every expiry header only once and use it both for removing
+        # expired files and, if that is not enough, for evicting the least
+        # recently used files.
+        now = time()
+        expired = []
+        alive = []
+        # The listing gives the exact count, which also picks up the files
+        # other processes added or removed since the last flush.
+        count = 0
+        for fname in self._list_dir():
+            try:
+                expires, last_used = self._read_expiry(fname, with_mtime=True)
+            except FileNotFoundError:
+                continue
+            except (OSError, struct.error):
+                logger.warning(
+                    "Exception raised while handling cache file '%s'",
+                    fname,
+                    exc_info=True,
+                )
+                count += 1
+                continue
+            count += 1
+            if expires != 0 and expires < now:
+                expired.append(fname)
+            else:
+                # File times are coarse, fall back to the expiry for ties.
+                alive.append((last_used, expires, fname))
+
+        count -= len(expired) - self._remove_files(expired)
+
+        if count > self._threshold:
+            # Evict a tenth of the threshold more than needed, so the next
+            # writes don't have to scan the whole directory again right away.
+            target = self._threshold - self._threshold // 10
+            alive.sort(key=lambda item: item[:2])
+            evicted = [fname for _, _, fname in alive[: count - target]]
+            count -= len(evicted) - self._remove_files(evicted)
+
+        self._update_count(value=count)
+
+    def has(self, key):
+        filename = self._get_filename(key)
+        try:
+            expires = self._read_expiry(filename)
+        except FileNotFoundError:  # if there is no file there is no key
+            return False
+        except (OSError, struct.error):
+            logger.warning(
+                "Exception raised while handling cache file '%s'",
+                filename,
+                exc_info=True,
+            )
+            return False
+        return expires == 0 or expires >= time()
+
+    def get(self, key):
+        filename = self._get_filename(key)
+        try:
+            fd = self._run_safely(os.open, filename, os.O_RDONLY | _O_BINARY)
+            if fd is None:
+                raise OSError
+            try:
+                data = os.read(fd, _READ_SIZE)
+                pickle_time = struct.unpack_from("I", data)[0]
+                if pickle_time == 0 or pickle_time >= time():
+                    if len(data) == _READ_SIZE:
+                        data = _read_rest(fd, data)
+                    value = self._load(data, 4)
+                    self._touch(fd, filename)
+                    return value
+                stat = os.fstat(fd)
+            finally:
+                os.close(fd)
+            # The entry expired, remove it unless it was replaced meanwhile.
+            if os.path.samestat(stat, os.stat(filename)):
+                if self._remove_file(filename):
+                    self._update_count(delta=-1)
+        except FileNotFoundError:
+            pass
+        except (OSError, EOFError, ValueError, struct.error, pickle.UnpicklingError):
+            logger.warning(
+                "Exception raised while handling cache file '%s'",
+                filename,
+                exc_info=True,
+            )
+        return None
+
+    def set(self, key, value, timeout=None, mgmt_element=False):
+        # Management elements have no timeout
+        if mgmt_element:
+            timeout = 0
+        # Don't prune on management element update, to avoid loop
+        else:
+            self._prune()
+
+        timeout = self._normalize_timeout(timeout)
+        filename = self._get_filename(key)
+        # Checking for an existing file is only needed to keep the file count
+        # up to date. Management elements should not count towards threshold.
+        is_new_file = (
+            self._threshold != 0 and not mgmt_element and not os.path.isfile(filename)
+        )
+
+        try:
+            chunks = self._dump(timeout, value)
+        except (pickle.PickleError, TypeError, AttributeError):
+            logger.warning(
+                "Exception raised while pickling the value for cache file '%s'",
+                filename,
+                exc_info=True,
+            )
+            return False
+
+        try:
+            fd, tmp = tempfile.mkstemp(
+                suffix=self._fs_transaction_suffix, dir=self._path
+            )
+            try:
+                _write_all(fd, chunks)
+                if self._mode != _MKSTEMP_MODE:
+                    if hasattr(os, "fchmod"):
+                        os.fchmod(fd, self._mode)
+                    else:
+                        self._run_safely(os.chmod, tmp, self._mode)
+            finally:
+                os.close(fd)
+
+            self._run_safely(os.replace, tmp, filename)
+        except OSError:
+            logger.warning(
+                "Exception raised while handling cache file '%s'",
+                filename,
+                exc_info=True,
+            )
+            return False
+        else:
+            if is_new_file:
+                self._update_count(delta=1)
+            # _write_all() raises unless every chunk, including the expiry
+            # header, has been written, so the file can't be empty here.
+            return True
+
+    def delete_many(self, *keys):
+        deleted_keys = []
+        removed = 0
+        for key in keys:
+            try:
+                os.remove(self._get_filename(key))
+            except FileNotFoundError:
+                # if file doesn't exist we consider it deleted
+                pass
+            except OSError:
+                logger.warning(
+                    "Exception raised while handling cache file", exc_info=True
+                )
+                if not self.ignore_errors:
+                    break
+                continue
+            else:
+                removed += 1
+            deleted_keys.append(key)
+
+        # Update the file count once instead of once per deleted file
+        if removed:
+            self._update_count(delta=-removed)
+        return deleted_keys
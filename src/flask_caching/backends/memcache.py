@@ -11,14 +11,22 @@
 
 import pickle
 import re
+from time import time
 
 from cachelib import MemcachedCache as CachelibMemcachedCache
 
 from flask_caching.backends.base import BaseCache
 
 
+# The same check as cachelib's, so that keys are accepted or rejected
+# consistently by the methods overridden here and those inherited.
 _test_memcached_key = re.compile(r"[^\x00-\x21\xff]{1,250}$").match
 
+#: Starts SpreadSASLMemcachedCache values that are byte strings stored as
+#: they are. Pickles always start with the PROTO opcode (``b"\x80"``), so
+#: a value can be told apart even when its chunk count was evicted.
+_RAW_TAG = b"R"
+
 
 class MemcachedCache(BaseCache, CachelibMemcachedCache):
     """A cache that uses memcached as backend.
@@ -70,12 +78,56 @@ class MemcachedCache(BaseCache, CachelibMemcachedCache):
         kwargs.update(dict(key_prefix=config["CACHE_KEY_PREFIX"]))
         return cls(*args, **kwargs)
 
-    def delete_many(self, *keys):
-        new_keys = []
+    def _normalize_timeout(self, timeout):
+        # Same as cachelib's version, without the extra call into the base
+        # class on every write.
+        if timeout is None:
+            timeout = self.default_timeout
+        if timeout > 0:
+            timeout = int(time()) + timeout
+        return timeout
+
+    def get_dict(self, *keys):
+        return self._get_multi(keys)
+
+    def get_many(self, *keys):
+        d = self._get_multi(keys)
+        return [d[key] for key in keys]
+
+    def _get_multi(self, keys):
+        """Like :meth:`get_dict`, but takes a sequence of keys instead of
+        unpacked arguments.
+        """
+        key_mapping = {}
         for key in keys:
-            key = self._normalize_key(key)
-            if _test_memcached_key(key):
-                new_keys.append(key)
+            encoded_key = self._normalize_key(key)
+            # Validate the prefixed key, that is what is sent to memcached.
+            if _test_memcached_key(encoded_key):
+                key_mapping[encoded_key] = key
+        rv = dict.fromkeys(keys)
+        if key_mapping:
+            for encoded_key, value in self._client.get_multi(list(key_mapping)).items():
+                rv[key_mapping[encoded_key]] = value
+        return rv
+
+    def has(self, key):
+        key = self._normalize_key(key)
+        if not _test_memcached_key(key):
+            return False
+        # An empty append only touches existing keys and, unlike a get,
+        # doesn't transfer the value. Not every client supports it though.
+        append = getattr(self._client, "append", None)
+        if append is None:
+            return self._client.get(key) is not None
+        return bool(append(key, ""))
+
+    def delete_many(self, *keys):
+        new_keys = [
+            key for key in map(self._normalize_key, keys) if _test_memcached_key(key)
+        ]
+        if not new_keys:
+            # Nothing to delete, don't make the client send an empty request.
+            return True
         return self._client.delete_multi(new_keys)
 
     def inc(self, key, delta=1):
@@ -128,7 +180,7 @@ class SpreadSASLMemcachedCache(SASLMemcachedCache):
     across multiple keys if they are bigger than a given threshold.
 
     Spreading requires using pickle to store the value, which can significantly
-    impact the performance.
+    impact the performance. Byte strings are stored as they are.
     """
 
     def __init__(self, *args, **kwargs):
@@ -138,8 +190,8 @@ class SpreadSASLMemcachedCache(SASLMemcachedCache):
                 memcached (memcache has an upper limit of 1MB for values,
                 default: 1048448)
         """
-        self.chunksize = kwargs.get("chunksize", 1048448)
-        self.maxchunk = kwargs.get("maxchunk", 32)
+        self.chunksize = kwargs.pop("chunksize", 1048448)
+        self.maxchunk = kwargs.pop("maxchunk", 32)
         super().__init__(*args, **kwargs)
 
     @classmethod
@@ -156,8 +208,8 @@ class SpreadSASLMemcachedCache(SASLMemcachedCache):
         return cls(*args, **kwargs)
 
     def delete(self, key):
-        for skey in self._genkeys(key):
-            super().delete(skey)
+        # One request for all the possible chunks instead of one per chunk.
+        super().delete_many(*self._genkeys(key))
 
     def set(self, key, value, timeout=None, chunk=True):
         """Set a value in cache, potentially spreading it across multiple key.
@@ -181,7 +233,12 @@ class SpreadSASLMemcachedCache(SASLMemcachedCache):
         # I didn't found a good way to avoid pickling/unpickling if
         # key is smaller than chunksize, because in case or <werkzeug.requests>
         # getting the length consume the data iterator.
-        serialized = pickle.dumps(value, 2)
+        # Byte strings (e.g. rendered responses) are the exception, they are
+        # chunked directly behind a tag that tells them apart from pickles.
+        if type(value) is bytes:
+            serialized = _RAW_TAG + value
+        else:
+            serialized = pickle.dumps(value, protocol=5)
         values = {}
         len_ser = len(serialized)
         chks = range(0, len_ser, self.chunksize)
@@ -189,8 +246,11 @@ class SpreadSASLMemcachedCache(SASLMemcachedCache):
         if len(chks) > self.maxchunk:
             raise ValueError("Cannot store value in less than %s keys" % self.maxchunk)
 
-        for i in chks:
-            values[f"{key}.{i // self.chunksize}"] = serialized[i : i + self.chunksize]
+        chunk_keys = self._chunk_keys(key, 0, len(chks))
+        for chunk_key, i in zip(chunk_keys, chks):
+            values[chunk_key] = serialized[i : i + self.chunksize]
+        # Lets _get() fetch only the chunks that belong to this value.
+        values[f"{key}.n"] = len(chks)
 
         super().set_many(values, timeout)
 
@@ -205,15 +265,35 @@ class SpreadSASLMemcachedCache(SASLMemcachedCache):
         else:
             return super().get(key)
 
+    def _chunk_keys(self, key, start, stop):
+        prefix = key + "."
+        return [prefix + str(i) for i in range(start, stop)]
+
     def _genkeys(self, key):
-        return [f"{key}.{i}" for i in range(self.maxchunk)]
+        return [f"{key}.n"] + self._chunk_keys(key, 0, self.maxchunk)
 
     def _get(self, key):
-        to_get = [f"{key}.{i}" for i in range(self.maxchunk)]
-        result = super().get_many(*to_get)
-        serialized = b"".join(v for v in result if v is not None)
-
-        if not serialized:
+        # The chunk count and the first chunk are fetched together, which is
+        # all that is needed for values that fit into a single chunk.
+        count, first = self._get_multi((f"{key}.n", f"{key}.0")).values()
+        if first is None:
             return None
 
-        return pickle.loads(serialized)
+        result = [first]
+        if count is None:
+            # Stored by an older version without a chunk count, all the
+            # possible chunks have to be probed.
+            to_get = self._chunk_keys(key, 1, self.maxchunk)
+            chunks = self._get_multi(to_get).values()
+            result.extend(v for v in chunks if v is not None)
+        elif count > 1:
+            to_get = self._chunk_keys(key, 1, count)
+            result.extend(self._get_multi(to_get).values())
+            if None in result:
+                # Some of the chunks have been evicted.
+                return None
+
+        if first[:1] == _RAW_TAG:
+            result[0] = first[1:]
+            return b"".join(result)
+        return pickle.loads(b"".join(result))
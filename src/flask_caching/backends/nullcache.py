@@ -21,3 +21,18 @@ class NullCache(BaseCache):
 
     def has(self, key):
         return False
+
+    # The bulk operations would otherwise call get(), set() or delete()
+    # once per key just to get the same constant back.
+
+    def get_many(self, *keys):
+        return [None] * len(keys)
+
+    def get_dict(self, *keys):
+        return dict.fromkeys(keys)
+
+    def set_many(self, mapping, timeout=None):
+        return list(mapping)
+
+    def delete_many(self, *keys):
+        return list(keys)
@@ -10,11 +10,77 @@
 """
 
 import pickle
+from urllib.parse import urlparse
 
 from cachelib import RedisCache as CachelibRedisCache
+from cachelib.serializers import RedisSerializer as CachelibRedisSerializer
 
 from flask_caching.backends.base import BaseCache
 
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+
+class RedisSerializer(CachelibRedisSerializer):
+    def loads(self, value):
+        """The reversal of :meth:`dumps`. This might be called with None."""
+        if value is None:
+            return None
+        if value[:1] == b"!":
+            try:
+                # A view avoids copying the pickle to strip the marker.
+                return pickle.loads(memoryview(value)[1:])
+            except pickle.PickleError:
+                return None
+        # Plain digits are counters written by INCR, anything else was
+        # stored before serialization was introduced. Checking first
+        # avoids raising and catching a ValueError for the latter.
+        digits = value[1:] if value[:1] == b"-" else value
+        if digits.isdigit():
+            return int(value)
+        return value
+
+
+class MsgpackRedisSerializer(RedisSerializer):
+    """Stores values made up of plain ``dict``, ``list``, ``str``, ``bytes``,
+    ``int``, ``float``, ``bool`` and ``None`` objects with `msgpack`, prefixed
+    by ``b"M"``. Everything else is pickled like :class:`RedisSerializer`
+    does. Every process sharing the cache needs to use this serializer.
+    """
+
+    def dumps(self, value, protocol=pickle.HIGHEST_PROTOCOL):
+        # strict_types makes msgpack reject tuples and subclasses of the
+        # builtin types instead of silently converting them, those are
+        # pickled so that they come back unchanged.
+        try:
+            return b"M" + msgpack.packb(value, use_bin_type=True, strict_types=True)
+        except (TypeError, ValueError, OverflowError):
+            return super().dumps(value, protocol)
+
+    def loads(self, value):
+        if value is not None and value[:1] == b"M":
+            try:
+                return msgpack.unpackb(
+                    memoryview(value)[1:], raw=False, strict_map_key=False
+                )
+            except (ValueError, msgpack.UnpackException):
+                # Not written by this serializer, e.g. a raw value.
+                return None
+        return super().loads(value)
+
+
+def _serializer_from_config(config):
+    name = config.get("CACHE_REDIS_SERIALIZER")
+    if name is None or name == "pickle":
+        return None
+    if name != "msgpack":
+        raise ValueError(f"unknown Redis serializer: {name!r}")
+    if msgpack is None:
+        raise RuntimeError("no msgpack module found")
+    return MsgpackRedisSerializer()
+
 
 class RedisCache(BaseCache, CachelibRedisCache):
     """Uses the Redis key-value store as a cache backend.
@@ -34,10 +100,14 @@ class RedisCache(BaseCache, CachelibRedisCache):
                             specified on :meth:`~BaseCache.set`. A timeout of
                             0 indicates that the cache never expires.
     :param key_prefix: A prefix that should be added to all keys.
+    :param serializer: the serializer used for the values, an instance of
+                       :class:`RedisSerializer` by default.
 
     Any additional keyword arguments will be passed to ``redis.Redis``.
     """
 
+    serializer = RedisSerializer()
+
     def __init__(
         self,
         host="localhost",
@@ -46,9 +116,17 @@ class RedisCache(BaseCache, CachelibRedisCache):
         db=0,
         default_timeout=300,
         key_prefix=None,
-        **kwargs
+        serializer=None,
+        **kwargs,
     ):
         BaseCache.__init__(self, default_timeout=default_timeout)
+        if serializer is not None:
+            self.serializer = serializer
+        if isinstance(host, str) and "unix_socket_path" not in kwargs:
+            # Keeps idle pooled connections from being dropped silently by
+            # firewalls and NAT gateways between requests. Unix domain
+            # socket connections don't accept the option.
+            kwargs.setdefault("socket_keepalive", True)
         CachelibRedisCache.__init__(
             self,
             host=host,
@@ -57,7 +135,7 @@ class RedisCache(BaseCache, CachelibRedisCache):
             db=db,
             default_timeout=default_timeout,
             key_prefix=key_prefix,
-            **kwargs
+            **kwargs,
         )
 
     @classmethod
@@ -82,9 +160,18 @@ class RedisCache(BaseCache, CachelibRedisCache):
         if key_prefix:
             kwargs["key_prefix"] = key_prefix
 
+        serializer = _serializer_from_config(config)
+        if serializer is not None:
+            kwargs["serializer"] = serializer
+
         redis_url = config.get("CACHE_REDIS_URL")
         if redis_url:
-            kwargs["host"] = redis_from_url(redis_url, db=kwargs.pop("db", None))
+            url_kwargs = {}
+            if urlparse(redis_url).scheme != "unix":
+                url_kwargs["socket_keepalive"] = kwargs.get("socket_keepalive", True)
+            kwargs["host"] = redis_from_url(
+                redis_url, db=kwargs.pop("db", None), **url_kwargs
+            )
 
         new_class = cls(*args, **kwargs)
 
@@ -99,17 +186,113 @@ class RedisCache(BaseCache, CachelibRedisCache):
             return str(value).encode("ascii")
         return b"!" + pickle.dumps(value)
 
+    def _get_prefix(self):
+        # cachelib only provides this method since 0.12.0.
+        if isinstance(self.key_prefix, str):
+            return self.key_prefix
+        return self.key_prefix()
+
+    def add(self, key, value, timeout=None):
+        timeout = self._normalize_timeout(timeout)
+        dump = self.serializer.dumps(value)
+        name = self._get_prefix() + key
+        # SET NX sets the expiry in the same atomic command, unlike SETNX
+        # followed by EXPIRE, which also left the key without one if the
+        # second command failed.
+        if timeout == -1:
+            return bool(self._write_client.set(name=name, value=dump, nx=True))
+        return bool(self._write_client.set(name=name, value=dump, nx=True, ex=timeout))
+
+    def get_many(self, *keys):
+        # Resolve a callable key_prefix once, not once per key.
+        prefix = self._get_prefix()
+        loads = self.serializer.loads
+        unique = dict.fromkeys(keys)
+        if len(unique) == len(keys):
+            names = [prefix + key for key in keys] if prefix else keys
+            return [loads(x) for x in self._read_client.mget(names)]
+
+        # Fetch repeated keys only once. Every position still gets its own
+        # loaded value so that mutable values aren't shared between them.
+        values = self._read_client.mget([prefix + key for key in unique])
+        raw = dict(zip(unique, values))
+        return [loads(raw[key]) for key in keys]
+
+    def set_many(self, mapping, timeout=None):
+        if not mapping:
+            return []
+        timeout = self._normalize_timeout(timeout)
+        prefix = self._get_prefix()
+        dumps = self.serializer.dumps
+
+        if timeout == -1:
+            # Without an expiry a single MSET stores everything.
+            self._mset({prefix + key: dumps(value) for key, value in mapping.items()})
+            return list(mapping)
+
+        # Use transaction=False to batch without calling redis MULTI
+        # which is not supported by twemproxy
+        pipe = self._write_client.pipeline(transaction=False)
+        for key, value in mapping.items():
+            pipe.setex(name=prefix + key, value=dumps(value), time=timeout)
+        results = pipe.execute()
+        return [k for k, was_set in zip(mapping.keys(), results) if was_set]
+
+    def _mset(self, mapping):
+        self._write_client.mset(mapping)
+
+    def delete_many(self, *keys):
+        if not keys:
+            return []
+        prefix = self._get_prefix()
+        # Send all deletes in one round trip. As with delete(), a key only
+        # counts as deleted if it existed.
+        pipe = self._write_client.pipeline(transaction=False)
+        for key in keys:
+            pipe.delete(prefix + key)
+        deleted_keys = []
+        for key, deleted in zip(keys, pipe.execute()):
+            if deleted:
+                deleted_keys.append(key)
+            elif not self.ignore_errors:
+                break
+        return deleted_keys
+
+    def clear(self):
+        prefix = self._get_prefix()
+        if not prefix:
+            return bool(self._write_client.flushdb())
+
+        # KEYS blocks the server while it walks the whole keyspace, SCAN
+        # returns the matching keys in small batches instead.
+        status = 0
+        batch = []
+        for key in self._read_client.scan_iter(match=prefix + "*", count=1000):
+            batch.append(key)
+            if len(batch) == 1000:
+                status += self._unlink(batch)
+                batch = []
+        if batch:
+            status += self._unlink(batch)
+        return bool(status)
+
     def unlink(self, *keys):
         """when redis-py >= 3.0.0 and redis > 4, support this operation"""
         if not keys:
             return
-        if self.key_prefix:
-            keys = [self.key_prefix + key for key in keys]
+        prefix = self._get_prefix()
+        if prefix:
+            keys = [prefix + key for key in keys]
+        return self._unlink(keys)
 
-        unlink = getattr(self._write_client, "unlink", None)
-        if unlink is not None and callable(unlink):
-            return self._write_client.unlink(*keys)
-        return self._write_client.delete(*keys)
+    def _unlink(self, keys):
+        # Looked up per call because the clients can be replaced after
+        # construction, which the sentinel and cluster caches rely on.
+        client = self._write_client
+        unlink = getattr(client, "unlink", None)
+        if callable(unlink):
+            return unlink(*keys)
+        return client.delete(*keys)
 
 
 class RedisSentinelCache(RedisCache):
@@ -130,6 +313,8 @@ class RedisSentinelCache(RedisCache):
                             specified on :meth:`~BaseCache.set`. A timeout of
                             0 indicates that the cache never expires.
     :param key_prefix: A prefix that should be added to all keys.
+    :param serializer: the serializer used for the values, an instance of
+                       :class:`RedisSerializer` by default.
 
     Any additional keyword arguments will be passed to
     ``redis.sentinel.Sentinel``.
@@ -143,9 +328,14 @@ class RedisSentinelCache(RedisCache):
         db=0,
         default_timeout=300,
         key_prefix="",
-        **kwargs
+        serializer=None,
+        **kwargs,
     ):
-        super().__init__(key_prefix=key_prefix, default_timeout=default_timeout)
+        super().__init__(
+            key_prefix=key_prefix,
+            default_timeout=default_timeout,
+            serializer=serializer,
+        )
 
         try:
             import redis.sentinel
@@ -172,7 +362,7 @@ class RedisSentinelCache(RedisCache):
             password=password,
             db=db,
             sentinel_kwargs=sentinel_kwargs,
-            **kwargs
+            **kwargs,
         )
 
         self._write_client = sentinel.master_for(master)
@@ -188,6 +378,7 @@ class RedisSentinelCache(RedisCache):
                 sentinel_password=config.get("CACHE_REDIS_SENTINEL_PASSWORD", None),
                 key_prefix=config.get("CACHE_KEY_PREFIX", None),
                 db=config.get("CACHE_REDIS_DB", 0),
+                serializer=_serializer_from_config(config),
             )
         )
 
@@ -212,15 +403,27 @@ class RedisClusterCache(RedisCache):
                             specified on :meth:`~BaseCache.set`. A timeout of
                             0 indicates that the cache never expires.
     :param key_prefix: A prefix that should be added to all keys.
+    :param serializer: the serializer used for the values, an instance of
+                       :class:`RedisSerializer` by default.
 
     Any additional keyword arguments will be passed to
     ``rediscluster.RedisCluster``.
     """
 
     def __init__(
-        self, cluster="", password="", default_timeout=300, key_prefix="", **kwargs
+        self,
+        cluster="",
+        password="",
+        default_timeout=300,
+        key_prefix="",
+        serializer=None,
+        **kwargs,
     ):
-        super().__init__(key_prefix=key_prefix, default_timeout=default_timeout)
+        super().__init__(
+            key_prefix=key_prefix,
+            default_timeout=default_timeout,
+            serializer=serializer,
+        )
 
         if kwargs.get("decode_responses", None):
             raise ValueError("decode_responses is not supported by RedisCache.")
@@ -250,7 +453,7 @@ class RedisClusterCache(RedisCache):
             startup_nodes=startup_nodes,
             password=password,
             skip_full_coverage_check=skip_full_coverage_check,
-            **kwargs
+            **kwargs,
         )
 
         self._write_client = cluster
@@ -264,6 +467,11 @@ class RedisClusterCache(RedisCache):
                 password=config.get("CACHE_REDIS_PASSWORD", ""),
                 default_timeout=config.get("CACHE_DEFAULT_TIMEOUT", 300),
                 key_prefix=config.get("CACHE_KEY_PREFIX", ""),
+                serializer=_serializer_from_config(config),
             )
         )
         return cls(*args, **kwargs)
+
+    def _mset(self, mapping):
+        # MSET only works for keys in the same hash slot, this splits them.
+        self._write_client.mset_nonatomic(mapping)
@@ -10,6 +10,7 @@
 """
 
 import logging
+from time import time
 
 from cachelib import SimpleCache as CachelibSimpleCache
 
@@ -45,6 +46,44 @@ class SimpleCache(BaseCache, CachelibSimpleCache):
 
         self.ignore_errors = ignore_errors
 
+    # The bulk operations work on ``_cache`` directly instead of going
+    # through ``get``/``set``/``delete`` once per key, so a batch costs a
+    # single timeout normalization and a single pruning pass.
+
+    def get_many(self, *keys):
+        cache = self._cache
+        loads = self.serializer.loads
+        now = time()
+        values = []
+        for key in keys:
+            try:
+                expires, value = cache[key]
+            except KeyError:
+                values.append(None)
+                continue
+            values.append(loads(value) if expires == 0 or expires > now else None)
+        return values
+
+    def set_many(self, mapping, timeout=None):
+        expires = self._normalize_timeout(timeout)
+        dumps = self.serializer.dumps
+        # Prune first like set() does, so that the new keys can't be evicted.
+        self._prune()
+        self._cache.update(
+            {key: (expires, dumps(value)) for key, value in mapping.items()}
+        )
+        return list(mapping)
+
+    def delete_many(self, *keys):
+        pop = self._cache.pop
+        deleted_keys = []
+        for key in keys:
+            if pop(key, None) is not None:
+                deleted_keys.append(key)
+            elif not self.ignore_errors:
+                break
+        return deleted_keys
+
     @classmethod
     def factory(cls, app, config, args, kwargs):
         kwargs.update(
@@ -4,12 +4,18 @@ from flask_caching.contrib.uwsgicache import UWSGICache as _UWSGICache
 
 
 class UWSGICache(_UWSGICache):
+    #: Set once the deprecation warning was shown, so that apps creating
+    #: several caches (or test suites) don't pay for it every time.
+    _deprecation_warned = False
+
     def __init__(self, *args, **kwargs):
-        warnings.warn(
-            "Importing UWSGICache from flask_caching.backends is deprecated, "
-            "use flask_caching.contrib.uwsgicache.UWSGICache instead",
-            category=DeprecationWarning,
-            stacklevel=2,
-        )
+        if not UWSGICache._deprecation_warned:
+            UWSGICache._deprecation_warned = True
+            warnings.warn(
+                "Importing UWSGICache from flask_caching.backends is deprecated, "
+                "use flask_caching.contrib.uwsgicache.UWSGICache instead",
+                category=DeprecationWarning,
+                stacklevel=2,
+            )
 
         super().__init__(*args, **kwargs)
@@ -14,6 +14,37 @@ try:
 except ImportError as e:
     raise RuntimeError("no google-cloud-storage module found") from e
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    _HAS_ORJSON = False
+else:
+    _HAS_ORJSON = True
+    # Leave the types the json module can't serialize either (and
+    # subclasses of the builtin types) to it, so that they end up stored
+    # the same way no matter if orjson is installed.
+    _ORJSON_OPTIONS = (
+        orjson.OPT_PASSTHROUGH_DATACLASS
+        | orjson.OPT_PASSTHROUGH_DATETIME
+        | orjson.OPT_PASSTHROUGH_SUBCLASS
+    )
+
+
+def _json_dumps(value):
+    if _HAS_ORJSON:
+        try:
+            data = orjson.dumps(value, option=_ORJSON_OPTIONS)
+        except TypeError:
+            # orjson refuses some values the json module accepts, like
+            # dicts with non-string keys or integers wider than 64 bits.
+            pass
+        else:
+            # orjson writes NaN and infinities as null, where the json
+            # module keeps them. Values without a null can't contain any.
+            if b"null" not in data:
+                return data
+    return json.dumps(value)
+
 
 class GoogleCloudStorageCache(BaseCache):
     """Uses an Google Cloud Storage bucket as a cache backend.
@@ -38,6 +69,7 @@ class GoogleCloudStorageCache(BaseCache):
                                            a response is returned. Will slow
                                            down responses.
     :param anonymous: If true, use anonymous credentials. Useful for testing.
+    If `orjson` is installed, it is used to serialize JSON values.
     Any additional keyword arguments will be passed to ``google.cloud.storage.Client``.
     """
 
@@ -89,6 +121,8 @@ class GoogleCloudStorageCache(BaseCache):
                     result = blob.download_as_bytes()
                     hit_or_miss = "hit"
                     if blob.content_type == "application/json":
+                        # Not orjson, which parses integers wider than
+                        # 64 bits as floats.
                         result = json.loads(result)
                 except exceptions.NotFound:
                     pass
@@ -100,10 +134,14 @@ class GoogleCloudStorageCache(BaseCache):
         result = False
         full_key = self.key_prefix + key
         content_type = "application/json"
-        try:
-            value = json.dumps(value)
-        except (UnicodeDecodeError, TypeError):
+        if isinstance(value, bytes):
+            # Never JSON serializable, don't wait for the exception.
             content_type = "application/octet-stream"
+        else:
+            try:
+                value = _json_dumps(value)
+            except (UnicodeDecodeError, TypeError):
+                content_type = "application/octet-stream"
         blob = self.bucket.blob(full_key)
         if timeout is None:
             timeout = self.default_timeout
@@ -73,24 +73,32 @@ class CacheExtension(Extension):
         while parser.stream.skip_if("comma"):
             vary_on.append(parser.parse_expression())
 
-        if vary_on:
-            args.append(nodes.List(vary_on))
+        body = parser.parse_statements(["name:endcache"], drop_needle=True)
+
+        if not vary_on and isinstance(args[1], nodes.Const):
+            #: The key doesn't depend on the context, so build it once
+            #: here instead of on every render.
+            key = make_template_fragment_key(args[1].value)
+            call = self.call_method("_cache_fragment", [args[0], nodes.Const(key)])
         else:
-            args.append(nodes.Const([]))
+            if vary_on:
+                args.append(nodes.List(vary_on))
+            else:
+                args.append(nodes.Const([]))
+            call = self.call_method("_cache", args)
 
-        body = parser.parse_statements(["name:endcache"], drop_needle=True)
-        return nodes.CallBlock(
-            self.call_method("_cache", args), [], [], body
-        ).set_lineno(lineno)
+        return nodes.CallBlock(call, [], [], body).set_lineno(lineno)
 
     def _cache(self, timeout, fragment_name, vary_on, caller):
+        key = make_template_fragment_key(fragment_name, vary_on=vary_on)
+        return self._cache_fragment(timeout, key, caller)
+
+    def _cache_fragment(self, timeout, key, caller):
         try:
             cache = getattr(self.environment, JINJA_CACHE_ATTR_NAME)
         except AttributeError as e:
             raise e
 
-        key = make_template_fragment_key(fragment_name, vary_on=vary_on)
-
         #: Delete key if timeout is 'del'
         if timeout == "del":
             cache.delete(key)
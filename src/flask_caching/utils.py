@@ -3,18 +3,37 @@ import string
 from typing import Callable
 from typing import List
 from typing import Optional
+from typing import Tuple
+from weakref import WeakKeyDictionary
 
 TEMPLATE_FRAGMENT_KEY_TEMPLATE = "_template_fragment_cache_%s%s"
-# Used to remove control characters and whitespace from cache keys.
+# Meant to remove control characters and whitespace from cache keys. The
+# table is keyed by characters instead of ordinals though, so str.translate
+# never removed anything with it. Namespaces are no longer run through it;
+# actually stripping characters now would change every existing key and
+# could make distinct instance tokens collide.
 valid_chars = set(string.ascii_letters + string.digits + "_.")
 del_chars = "".join(c for c in map(chr, range(256)) if c not in valid_chars)
 null_control = ({k: None for k in del_chars},)
 
+#: Caches what :func:`function_namespace` needs to know about a function
+#: apart from the arguments it is called with, as inspecting the signature
+#: is by far the most expensive part of it.
+_function_info_cache: "WeakKeyDictionary[Callable, Tuple]" = WeakKeyDictionary()
+
 
 def wants_args(f: Callable) -> bool:
     """Check if the function wants any arguments"""
-    arg_spec = inspect.getfullargspec(f)
-    return bool(arg_spec.args or arg_spec.varargs or arg_spec.varkw)
+    code = getattr(f, "__code__", None)
+    if code is None:
+        arg_spec = inspect.getfullargspec(f)
+        return bool(arg_spec.args or arg_spec.varargs or arg_spec.varkw)
+    # The same answer as above, straight from the code object. Keyword-only
+    # arguments don't count, just like they don't for getfullargspec.
+    return bool(
+        code.co_argcount
+        or code.co_flags & (inspect.CO_VARARGS | inspect.CO_VARKEYWORDS)
+    )
 
 
 def get_function_parameters(f: Callable) -> List:
@@ -25,11 +44,27 @@ def get_function_parameters(f: Callable) -> List:
     return list(inspect.signature(f).parameters.values())
 
 
+def _is_plain_function(f: Callable) -> bool:
+    """Check if the signature of ``f`` can be read from its code object.
+
+    Plain functions list their positional parameters first in co_varnames,
+    positional-only ones before the others.
+    """
+    return (
+        inspect.isfunction(f)
+        and not hasattr(f, "__wrapped__")
+        and not hasattr(f, "__signature__")
+    )
+
+
 def get_arg_names(f: Callable) -> List[str]:
     """Return arguments of function
     :param f:
     :return: String list of arguments
     """
+    if _is_plain_function(f):
+        code = f.__code__
+        return list(code.co_varnames[code.co_posonlyargcount : code.co_argcount])
     return [
         parameter.name
         for parameter in get_function_parameters(f)
@@ -37,6 +72,17 @@ def get_arg_names(f: Callable) -> List[str]:
     ]
 
 
+def _first_arg_name(f: Callable) -> Optional[str]:
+    """Return the first name :func:`get_arg_names` would, if any."""
+    if _is_plain_function(f):
+        code = f.__code__
+        if code.co_argcount > code.co_posonlyargcount:
+            return code.co_varnames[code.co_posonlyargcount]
+        return None
+    m_args = get_arg_names(f)
+    return m_args[0] if m_args else None
+
+
 def get_arg_default(f: Callable, position: int):
     arg = get_function_parameters(f)[position]
     arg_def = arg.default
@@ -47,28 +93,14 @@ def get_id(obj):
     return getattr(obj, "__caching_id__", repr)(obj)
 
 
-def function_namespace(f, args=None):
-    """Attempts to returns unique namespace for function"""
-    m_args = get_arg_names(f)
-
-    instance_token = None
-
-    instance_self = getattr(f, "__self__", None)
-
-    if instance_self and not inspect.isclass(instance_self):
-        instance_token = get_id(f.__self__)
-    elif m_args and m_args[0] == "self" and args:
-        instance_token = get_id(args[0])
+def _function_info(f, args):
+    """Return the first argument name, module and name of ``f`` along with
+    the namespace made of the last two.
+    """
+    first_arg = _first_arg_name(f)
 
     module = f.__module__
 
-    if m_args and m_args[0] == "cls" and not inspect.isclass(args[0]):
-        raise ValueError(
-            "When using `delete_memoized` on a "
-            "`@classmethod` you must provide the "
-            "class as the first argument"
-        )
-
     if hasattr(f, "__qualname__"):
         name = f.__qualname__
     else:
@@ -81,10 +113,10 @@ def function_namespace(f, args=None):
             klass = getattr(f, "im_class", None)
 
         if not klass:
-            if m_args and args:
-                if m_args[0] == "self":
+            if first_arg and args:
+                if first_arg == "self":
                     klass = args[0].__class__
-                elif m_args[0] == "cls":
+                elif first_arg == "cls":
                     klass = args[0]
 
         if klass:
@@ -92,13 +124,41 @@ def function_namespace(f, args=None):
         else:
             name = f.__name__
 
-    ns = ".".join((module, name)).translate(*null_control)
+    ns = ".".join((module, name))
+    return first_arg, module, name, ns
 
-    ins = (
-        ".".join((module, name, instance_token)).translate(*null_control)
-        if instance_token
-        else None
-    )
+
+def function_namespace(f, args=None):
+    """Attempts to returns unique namespace for function"""
+    try:
+        first_arg, module, name, ns = _function_info_cache[f]
+    except (KeyError, TypeError):
+        info = first_arg, module, name, ns = _function_info(f, args)
+        # Bound methods are created anew on every attribute access, and
+        # without a __qualname__ the name may depend on ``args``.
+        if hasattr(f, "__qualname__") and not inspect.ismethod(f):
+            try:
+                _function_info_cache[f] = info
+            except TypeError:
+                pass
+
+    instance_token = None
+
+    instance_self = getattr(f, "__self__", None)
+
+    if instance_self and not inspect.isclass(instance_self):
+        instance_token = get_id(f.__self__)
+    elif first_arg == "self" and args:
+        instance_token = get_id(args[0])
+
+    if first_arg == "cls" and not inspect.isclass(args[0]):
+        raise ValueError(
+            "When using `delete_memoized` on a "
+            "`@classmethod` you must provide the "
+            "class as the first argument"
+        )
+
+    ins = ".".join((module, name, instance_token)) if instance_token else None
 
     return ns, ins
 
@@ -107,8 +167,7 @@ def make_template_fragment_key(
     fragment_name: str, vary_on: Optional[List[str]] = None
 ) -> str:
     """Make a cache key for a specific fragment name."""
+    # Same format as TEMPLATE_FRAGMENT_KEY_TEMPLATE, in a single step.
     if vary_on:
-        fragment_name = "%s_" % fragment_name
-    else:
-        vary_on = []
-    return TEMPLATE_FRAGMENT_KEY_TEMPLATE % (fragment_name, "_".join(vary_on))
+        return f"_template_fragment_cache_{fragment_name}_{'_'.join(vary_on)}"
+    return f"_template_fragment_cache_{fragment_name}"
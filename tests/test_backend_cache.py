@@ -8,12 +8,15 @@
     :license: BSD, see LICENSE for more details.
 """
 
+import os
 import pickle
 import time
 
 import pytest
 
 from flask_caching import backends
+from flask_caching.backends import filesystemcache
+from flask_caching.backends import rediscache
 from flask_caching.backends import RedisSentinelCache
 
 try:
@@ -152,12 +155,192 @@ class TestSimpleCache(GenericCacheTests):
         # Cache purges old items *before* it sets new ones.
         assert len(c._cache) == 3
 
+    def test_set_many_purge(self):
+        c = backends.SimpleCache(threshold=2)
+        assert c.set_many({"a": "a", "b": "b", "c": "c"}, timeout=100) == list("abc")
+        # Old items are purged *before* the new ones are set.
+        assert c.set_many({"d": "d", "e": "e"}, timeout=0) == ["d", "e"]
+        assert c.get_many("d", "e") == ["d", "e"]
+        assert len(c._cache) == 4
+
+    def test_delete_many_ignore_errors(self):
+        c = backends.SimpleCache()
+        c.set_many({"a": 1, "c": 3})
+        assert c.delete_many("a", "b", "c") == ["a"]
+        assert c.get_many("a", "b", "c") == [None, None, 3]
+
+        c = backends.SimpleCache(ignore_errors=True)
+        c.set_many({"a": 1, "c": 3})
+        assert c.delete_many("a", "b", "c") == ["a", "c"]
+
+
+class ZeroCopyByteArray(bytearray):
+    """A bytearray that is pickled with out-of-band buffers in protocol 5."""
+
+    def __reduce_ex__(self, protocol):
+        if protocol >= 5:
+            return type(self)._reconstruct, (pickle.PickleBuffer(self),), None
+        return type(self)._reconstruct, (bytearray(self),)
+
+    @classmethod
+    def _reconstruct(cls, obj):
+        with memoryview(obj) as m:
+            return cls(m.obj)
+
 
 class TestFileSystemCache(GenericCacheTests):
     @pytest.fixture
     def make_cache(self, tmpdir):
         return lambda **kw: backends.FileSystemCache(cache_dir=str(tmpdir), **kw)
 
+    def test_out_of_band_buffers(self, c):
+        value = {"first": ZeroCopyByteArray(b"x" * 4096), "second": [1, 2]}
+        assert c.set("foo", value)
+        result = c.get("foo")
+        assert result == value
+        assert type(result["first"]) is ZeroCopyByteArray
+        assert c.has("foo")
+
+    @pytest.mark.parametrize(
+        "value",
+        (
+            {"a": [1, 2.5, None, True], 3: b"bytes", "nested": {"x": "y"}},
+            (1, 2),
+            [1, (2, 3)],
+            {1, 2},
+            {(1, 2): "tuple key"},
+            2**70,
+            "x" * 100_000,
+        ),
+    )
+    @pytest.mark.parametrize("use_msgpack", (False, True))
+    def test_values_round_trip(self, make_cache, value, use_msgpack):
+        if use_msgpack:
+            pytest.importorskip("msgpack")
+        c = make_cache(use_msgpack=use_msgpack)
+        assert c.set("foo", value)
+        result = c.get("foo")
+        assert result == value
+        assert type(result) is type(value)
+
+    def test_large_out_of_band_buffers(self, c):
+        value = ZeroCopyByteArray(b"x" * 100_000)
+        assert c.set("foo", value)
+        result = c.get("foo")
+        assert result == value
+        assert type(result) is ZeroCopyByteArray
+
+    @pytest.mark.skipif(os.name == "nt", reason="POSIX file modes only")
+    @pytest.mark.parametrize("mode", (0o600, 0o644))
+    def test_file_mode(self, make_cache, mode):
+        c = make_cache(mode=mode)
+        assert c.set("foo", "bar")
+        assert os.stat(c._get_filename("foo")).st_mode & 0o777 == mode
+
+    def test_msgpack_payload(self, c, make_cache):
+        pytest.importorskip("msgpack")
+        # Pickle stays the default.
+        assert c.set("foo", {"spam": ["eggs"]})
+        with open(c._get_filename("foo"), "rb") as f:
+            assert f.read()[4:5] == b"\x80"
+
+        c = make_cache(use_msgpack=True)
+        assert c.set("foo", {"spam": ["eggs"]})
+        with open(c._get_filename("foo"), "rb") as f:
+            assert f.read()[4:5] == b"M"
+        assert c.set("bar", ("spam", "eggs"))
+        with open(c._get_filename("bar"), "rb") as f:
+            assert f.read()[4:5] == b"\x80"
+
+    def test_prune(self, make_cache):
+        c = make_cache(threshold=2)
+        c.set("a", "a", timeout=1)
+        c.set("b", "b", timeout=100)
+        c.set("c", "c", timeout=50)
+        time.sleep(2)
+        # The expired item is pruned *before* the new one is set.
+        c.set("d", "d")
+        assert c._file_count == 3
+        assert not c.has("a")
+        # Still over threshold, so the least recently used item is evicted.
+        past = time.time() - 2 * c._touch_interval
+        for key in ("b", "c"):
+            os.utime(c._get_filename(key), (past, past))
+        assert c.get("b") == "b"
+        c.set("e", "e")
+        assert c._file_count == 3
+        assert not c.has("c")
+        assert c.has("b") and c.has("d") and c.has("e")
+
+    def test_get_touch_interval(self, make_cache):
+        c = make_cache()
+        c.set("foo", "bar")
+        filename = c._get_filename("foo")
+        recent = time.time() - c._touch_interval / 2
+        os.utime(filename, (recent, recent))
+        assert c.get("foo") == "bar"
+        assert os.stat(filename).st_mtime == pytest.approx(recent)
+        past = time.time() - 2 * c._touch_interval
+        os.utime(filename, (past, past))
+        assert c.get("foo") == "bar"
+        assert os.stat(filename).st_mtime > recent
+
+    def test_prune_below_threshold(self, make_cache):
+        c = make_cache(threshold=20)
+        for i in range(22):
+            c.set(str(i), i, timeout=100 + i)
+        # Pruning evicts down to 90% of the threshold before the last set.
+        assert c._file_count == 19
+        assert not any(c.has(str(i)) for i in range(3))
+        assert all(c.has(str(i)) for i in range(3, 22))
+
+    def test_get_removes_expired_file(self, make_cache, monkeypatch):
+        c = make_cache(threshold=20)
+        c.set("a", "a", timeout=10)
+        c.set("b", "b", timeout=100)
+        now = time.time()
+        monkeypatch.setattr(filesystemcache, "time", lambda: now + 50)
+        assert c.get("a") is None
+        assert not os.path.exists(c._get_filename("a"))
+        assert c._file_count == 1
+        assert c.get("b") == "b"
+
+    @pytest.mark.parametrize("parallel_min", (2, 128))
+    def test_clear(self, make_cache, monkeypatch, parallel_min):
+        monkeypatch.setattr(filesystemcache, "_PARALLEL_REMOVE_MIN", parallel_min)
+        c = make_cache(threshold=20)
+        assert c.set_many({str(i): i for i in range(10)})
+        assert c.clear()
+        assert c._file_count == 0
+        assert c._list_dir() == []
+
+    def test_file_count_shared_between_instances(self, make_cache):
+        c1 = make_cache()
+        c2 = make_cache()
+        c1._fs_count_flush_interval = c2._fs_count_flush_interval = 2
+        c1.set("a", "a")
+        # Updates are kept in memory until the flush interval is reached.
+        assert c1._file_count == 1
+        assert c1.get(c1._fs_count_file) == 0
+        c1.set("b", "b")
+        assert c1.get(c1._fs_count_file) == 2
+        c2.set("c", "c")
+        c2.set("d", "d")
+        # Flushing merges the updates made by other instances.
+        assert c2._file_count == 4
+        assert c2.get(c2._fs_count_file) == 4
+
+    def test_delete_many_updates_count(self, c):
+        assert c.set_many({"foo": "bar", "spam": "eggs", "baz": "qux"})
+        assert c._file_count == 3
+        assert c.delete_many("foo", "spam", "missing") == ["foo", "spam", "missing"]
+        assert c._file_count == 1
+        assert c.get("baz") == "qux"
+
+    def test_unpicklable_value(self, c):
+        assert not c.set("foo", lambda: None)
+        assert c.get("foo") is None
+
 
 # don't use pytest.mark.skipif on subclasses
 # https://bitbucket.org/hpk42/pytest/issue/568
@@ -195,6 +378,30 @@ class TestRedisCache(GenericCacheTests):
         assert c._write_client.set(c.key_prefix + "foo", "42")
         assert c.get("foo") == 42
 
+    def test_set_many_without_timeout(self, c):
+        assert c.set_many({"foo": "bar", "spam": 42}, timeout=0) == ["foo", "spam"]
+        assert c.get_many("foo", "spam") == ["bar", 42]
+        assert c._read_client.ttl(c._get_prefix() + "foo") == -1
+        assert c.set_many({}) == []
+
+    def test_add_sets_expiry(self, c):
+        assert c.add("foo", "bar", timeout=100)
+        assert 0 < c._read_client.ttl(c._get_prefix() + "foo") <= 100
+        assert not c.add("foo", "qux", timeout=100)
+        assert c.add("spam", "eggs", timeout=0)
+        assert c._read_client.ttl(c._get_prefix() + "spam") == -1
+        assert c.get_many("foo", "spam") == ["bar", "eggs"]
+
+    def test_clear_keeps_other_keys(self, c):
+        c._write_client.set("other-key", "1")
+        try:
+            assert c.set_many({"foo": 1, "bar": 2})
+            assert c.clear()
+            assert c.get_many("foo", "bar") == [None, None]
+            assert c._read_client.exists("other-key")
+        finally:
+            c._write_client.delete("other-key")
+
     def test_empty_host(self):
         with pytest.raises(ValueError) as exc_info:
             backends.RedisCache(host=None)
@@ -231,6 +438,129 @@ class TestRedisCacheClientsOverride(CacheTestsBase):
         for actual, expected in zip(actual_values, EXPECTED_GET_MANY_VALUES):
             assert actual == expected
 
+    def test_load_raw_values(self, c):
+        class DummyReadClient:
+            def mget(self, *args, **kwargs):
+                return [b"!" + pickle.dumps("spam"), b"42", b"-7", b"eggs", b"", None]
+
+        c._read_client = DummyReadClient()
+        assert c.get_many("foo") == ["spam", 42, -7, b"eggs", b"", None]
+
+    def test_get_many_duplicate_keys(self, c):
+        calls = []
+
+        class DummyReadClient:
+            def mget(self, keys):
+                calls.append(keys)
+                return [b"!" + pickle.dumps([key]) for key in keys]
+
+        c._read_client = DummyReadClient()
+        values = c.get_many("foo", "bar", "foo")
+        assert values == [["foo"], ["bar"], ["foo"]]
+        assert values[0] is not values[2]
+        assert calls == [["foo", "bar"]]
+
+    def test_get_many_callable_prefix(self, c):
+        calls = []
+
+        class DummyReadClient:
+            def mget(self, keys):
+                calls.append(keys)
+                return [None for key in keys]
+
+        c._read_client = DummyReadClient()
+        c.key_prefix = lambda: "prefix:"
+        assert c.get_many("foo", "bar") == [None, None]
+        assert calls == [["prefix:foo", "prefix:bar"]]
+
+    @pytest.mark.parametrize(
+        "ignore_errors, expected", ((False, ["foo"]), (True, ["foo", "bar"]))
+    )
+    def test_delete_many(self, c, ignore_errors, expected):
+        data = {"prefix:foo": b"1", "prefix:bar": b"2"}
+        calls = []
+
+        class DummyPipeline:
+            def __init__(self):
+                self.results = []
+
+            def delete(self, name):
+                self.results.append(int(data.pop(name, None) is not None))
+
+            def execute(self):
+                calls.append(self.results)
+                return self.results
+
+        class DummyWriteClient:
+            def pipeline(self, transaction=True):
+                return DummyPipeline()
+
+        c._write_client = DummyWriteClient()
+        c.key_prefix = "prefix:"
+        c.ignore_errors = ignore_errors
+        assert c.delete_many("foo", "spam", "bar", "foo") == expected
+        assert calls == [[1, 0, 1, 0]]
+        assert c.delete_many() == []
+        assert len(calls) == 1
+
+    def test_clear_with_prefix(self, c):
+        calls = []
+
+        class DummyClient:
+            def scan_iter(self, match, count):
+                calls.append(("scan_iter", match))
+                return iter([b"prefix:foo", b"prefix:bar"])
+
+            def unlink(self, *keys):
+                calls.append(("unlink", keys))
+                return len(keys)
+
+        c._read_client = c._write_client = DummyClient()
+        c.key_prefix = "prefix:"
+        assert c.clear()
+        assert calls == [
+            ("scan_iter", "prefix:*"),
+            ("unlink", (b"prefix:foo", b"prefix:bar")),
+        ]
+
+    def test_add_with_prefix(self, c):
+        calls = []
+
+        class DummyWriteClient:
+            def set(self, **kwargs):
+                calls.append(kwargs)
+                return True
+
+        c._write_client = DummyWriteClient()
+        c.key_prefix = "prefix:"
+        assert c.add("foo", "bar", timeout=100)
+        assert calls == [
+            {
+                "name": "prefix:foo",
+                "value": c.serializer.dumps("bar"),
+                "nx": True,
+                "ex": 100,
+            }
+        ]
+
+    def test_msgpack_serializer(self):
+        pytest.importorskip("msgpack")
+        serializer = rediscache.MsgpackRedisSerializer()
+        for value in ({"spam": [1, 2.5, None]}, "eggs", b"ham", 42):
+            data = serializer.dumps(value)
+            assert data[:1] == b"M"
+            assert serializer.loads(data) == value
+        # Tuples are pickled so that they don't come back as lists.
+        data = serializer.dumps(("spam", "eggs"))
+        assert data[:1] == b"!"
+        assert serializer.loads(data) == ("spam", "eggs")
+        assert serializer.loads(b"!" + pickle.dumps("spam")) == "spam"
+        assert serializer.loads(b"42") == 42
+        assert serializer.loads(None) is None
+        # Raw values starting with the tag are treated as misses.
+        assert serializer.loads(b"Mary had a little lamb") is None
+        assert serializer.loads(b"M\xc1") is None
+
 
 class TestMemcachedCache(GenericCacheTests):
     _can_use_fast_sleep = False
@@ -264,6 +594,160 @@ class TestMemcachedCache(GenericCacheTests):
         assert c.has("foo") is False
 
 
+class DictMemcachedClient:
+    """An in-process stand-in for a memcached client."""
+
+    def __init__(self):
+        self.data = {}
+        self.calls = []
+
+    def get(self, key):
+        self.calls.append(("get", key))
+        return self.data.get(key)
+
+    def get_multi(self, keys):
+        self.calls.append(("get_multi", list(keys)))
+        return {key: self.data[key] for key in keys if key in self.data}
+
+    def set_multi(self, mapping, timeout=0):
+        self.calls.append(("set_multi", list(mapping)))
+        self.data.update(mapping)
+        return []
+
+    def delete(self, key):
+        self.calls.append(("delete", key))
+        return self.data.pop(key, None) is not None
+
+    def delete_multi(self, keys):
+        self.calls.append(("delete_multi", list(keys)))
+        for key in keys:
+            self.data.pop(key, None)
+        return True
+
+
+class TestMemcachedCacheClient(CacheTestsBase):
+    @pytest.fixture
+    def make_cache(self):
+        return lambda **kw: backends.MemcachedCache(DictMemcachedClient(), **kw)
+
+    def test_get_dict(self, make_cache):
+        c = make_cache(key_prefix="prefix:")
+        c._client.data["prefix:foo"] = "bar"
+        assert c.get_dict("foo", "spam", "x" * 245) == {
+            "foo": "bar",
+            "spam": None,
+            "x" * 245: None,
+        }
+        assert c._client.calls == [("get_multi", ["prefix:foo", "prefix:spam"])]
+        assert c.get_many("spam", "foo") == [None, "bar"]
+
+    def test_has(self, c):
+        c._client.data["foo"] = "bar"
+        assert c.has("foo")
+        assert not c.has("spam")
+        assert not c.has("foo bar")
+        assert c._client.calls == [("get", "foo"), ("get", "spam")]
+
+    def test_delete_many_skips_invalid_keys(self, c):
+        c.delete_many("foo", "foo bar", "x" * 251)
+        assert c._client.calls == [("delete_multi", ["foo"])]
+        assert c.delete_many("foo bar")
+        assert len(c._client.calls) == 1
+
+    @pytest.mark.parametrize("key", ("foo", "foo\n", "foo bar"))
+    def test_key_validation_consistent(self, c, key):
+        c._client.data[key] = "bar"
+        expected = c.get(key)
+        assert c.get_many(key) == [expected]
+        assert c.has(key) is (expected is not None)
+
+
+class TestSpreadSASLMemcachedCache(CacheTestsBase):
+    @pytest.fixture
+    def make_cache(self):
+        def factory(**kwargs):
+            pytest.importorskip("pylibmc")
+            c = backends.SpreadSASLMemcachedCache(**kwargs)
+            c._client = DictMemcachedClient()
+            return c
+
+        return factory
+
+    def test_single_chunk(self, c):
+        c.set("foo", "bar")
+        c._client.calls.clear()
+        assert c.get("foo") == "bar"
+        assert c._client.calls == [("get_multi", ["foo.n", "foo.0"])]
+
+    def test_multiple_chunks(self, make_cache):
+        c = make_cache(chunksize=16)
+        value = list(range(20))
+        c.set("foo", value)
+        assert c._client.data["foo.n"] > 1
+        assert c.get("foo") == value
+        # Leftover chunks of a larger value are ignored.
+        c.set("foo", "bar")
+        assert c.get("foo") == "bar"
+
+    def test_chunk_options(self, make_cache):
+        # Not forwarded to pylibmc.Client, which doesn't accept them.
+        c = make_cache(chunksize=16, maxchunk=2)
+        assert (c.chunksize, c.maxchunk) == (16, 2)
+        with pytest.raises(ValueError):
+            c.set("foo", list(range(100)))
+
+    def test_pickled_bytes(self, make_cache):
+        c = make_cache(chunksize=1024)
+        value = [bytes(range(256)) * 10]
+        c.set("foo", value)
+        # Protocol 2 stored bytes as latin-1 text, taking up to twice the space.
+        assert c._client.data["foo.n"] == 3
+        assert c.get("foo") == value
+
+    @pytest.mark.parametrize("value", (b"bar", bytes(range(256)) * 10, b""))
+    def test_bytes_value(self, make_cache, value):
+        c = make_cache(chunksize=1024)
+        c.set("foo", value)
+        # Byte strings are stored without pickling them.
+        assert c._client.data["foo.0"] == (b"R" + value)[:1024]
+        assert c.get("foo") == value
+
+    @pytest.mark.parametrize("chunksize", (16, 1024))
+    def test_bytes_without_chunk_count(self, make_cache, chunksize):
+        c = make_cache(chunksize=chunksize)
+        value = pickle.dumps({"spam": "eggs"})
+        c.set("foo", value)
+        del c._client.data["foo.n"]
+        # Still returned as they are, not unpickled.
+        assert c.get("foo") == value
+
+    def test_evicted_chunk(self, make_cache):
+        c = make_cache(chunksize=16)
+        c.set("foo", list(range(20)))
+        del c._client.data["foo.1"]
+        assert c.get("foo") is None
+
+    def test_without_chunk_count(self, make_cache):
+        c = make_cache(chunksize=16)
+        value = list(range(20))
+        c.set("foo", value)
+        del c._client.data["foo.n"]
+        assert c.get("foo") == value
+
+    def test_delete(self, make_cache):
+        c = make_cache(chunksize=16, maxchunk=4)
+        c.set("foo", list(range(20)))
+        c._client.calls.clear()
+        c.delete("foo")
+        assert c._client.calls == [
+            ("delete_multi", ["foo.n", "foo.0", "foo.1", "foo.2", "foo.3"])
+        ]
+        assert c.get("foo") is None
+
+    def test_miss(self, c):
+        assert c.get("foo") is None
+
+
 class TestNullCache(CacheTestsBase):
     @pytest.fixture(scope="class", autouse=True)
     def make_cache(self):
@@ -271,3 +755,9 @@ class TestNullCache(CacheTestsBase):
 
     def test_has(self, c):
         assert not c.has("foo")
+
+    def test_many(self, c):
+        assert c.set_many({"foo": 1, "spam": 2}) == ["foo", "spam"]
+        assert c.get_many("foo", "spam") == [None, None]
+        assert c.get_dict("foo", "spam") == {"foo": None, "spam": None}
+        assert c.delete_many("foo", "spam") == ["foo", "spam"]
@@ -0,0 +1,26 @@
+import json
+import math
+
+import pytest
+
+pytest.importorskip("google.cloud.storage")
+pytest.importorskip("orjson")
+
+from flask_caching.contrib import googlecloudstoragecache  # noqa: E402
+
+
+@pytest.mark.parametrize(
+    "value",
+    (
+        {"spam": [1, 2.5, "eggs"]},
+        {"spam": None},
+        [math.nan, math.inf, -math.inf],
+        {"spam": [math.inf]},
+        {1: "eggs"},
+        2**70,
+    ),
+)
+def test_json_dumps(value):
+    # Stored the same way as with the json module, NaN included.
+    data = googlecloudstoragecache._json_dumps(value)
+    assert repr(json.loads(data)) == repr(json.loads(json.dumps(value)))
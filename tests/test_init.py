@@ -47,3 +47,67 @@ def test_init_nullcache(cache_type, app, tmp_path):
     cache = Cache(app=app)
 
     assert isinstance(app.extensions["cache"][cache], cache_type)
+
+
+@pytest.mark.parametrize("redis_url", (None, "redis://localhost:6379/0"))
+def test_redis_socket_keepalive(app, redis_url):
+    pytest.importorskip("redis")
+    app.config["CACHE_TYPE"] = "RedisCache"
+    app.config["CACHE_REDIS_URL"] = redis_url
+    cache = Cache(app=app)
+    client = app.extensions["cache"][cache]._write_client
+    assert client.connection_pool.connection_kwargs["socket_keepalive"] is True
+
+    app.config["CACHE_OPTIONS"] = {"socket_keepalive": False}
+    cache = Cache(app=app)
+    client = app.extensions["cache"][cache]._write_client
+    assert client.connection_pool.connection_kwargs["socket_keepalive"] is False
+
+
+def test_redis_unix_socket(app):
+    pytest.importorskip("redis")
+    app.config["CACHE_TYPE"] = "RedisCache"
+    app.config["CACHE_REDIS_URL"] = "unix:///tmp/redis.sock"
+    cache = Cache(app=app)
+    pool = app.extensions["cache"][cache]._write_client.connection_pool
+    assert "socket_keepalive" not in pool.connection_kwargs
+    # Unix socket connections reject socket_keepalive when they are created.
+    pool.make_connection()
+
+    app.config["CACHE_REDIS_URL"] = None
+    app.config["CACHE_OPTIONS"] = {"unix_socket_path": "/tmp/redis.sock"}
+    cache = Cache(app=app)
+    pool = app.extensions["cache"][cache]._write_client.connection_pool
+    assert "socket_keepalive" not in pool.connection_kwargs
+    pool.make_connection()
+
+
+def test_redis_serializer(app):
+    pytest.importorskip("redis")
+    pytest.importorskip("msgpack")
+    from flask_caching.backends.rediscache import MsgpackRedisSerializer
+
+    app.config["CACHE_TYPE"] = "RedisCache"
+    app.config["CACHE_REDIS_SERIALIZER"] = "msgpack"
+    cache = Cache(app=app)
+    assert isinstance(app.extensions["cache"][cache].serializer, MsgpackRedisSerializer)
+
+    app.config["CACHE_REDIS_SERIALIZER"] = "json"
+    with pytest.raises(ValueError):
+        Cache(app=app)
+
+
+def test_filesystem_serializer(app, tmp_path):
+    pytest.importorskip("msgpack")
+    app.config["CACHE_TYPE"] = "FileSystemCache"
+    app.config["CACHE_DIR"] = str(tmp_path)
+    cache = Cache(app=app)
+    assert not app.extensions["cache"][cache].use_msgpack
+
+    app.config["CACHE_FILESYSTEM_SERIALIZER"] = "msgpack"
+    cache = Cache(app=app)
+    assert app.extensions["cache"][cache].use_msgpack
+
+    app.config["CACHE_FILESYSTEM_SERIALIZER"] = "json"
+    with pytest.raises(ValueError):
+        Cache(app=app)
@@ -1,3 +1,5 @@
+import functools
+import hashlib
 import random
 import time
 
@@ -5,6 +7,7 @@ import pytest
 
 from flask_caching import Cache
 from flask_caching import function_namespace
+from flask_caching import get_arg_names
 
 
 def test_memoize(app, cache):
@@ -57,6 +60,39 @@ def test_memoize_hashes(app, cache, hash_method):
         assert big_foo(5, 3) != result2
 
 
+class _UncopyableHasher:
+    """A hasher whose constructor takes no data and which has no copy()."""
+
+    def __init__(self):
+        self._hash = hashlib.sha256()
+
+    def update(self, data):
+        self._hash.update(data)
+
+    def digest(self):
+        return self._hash.digest()
+
+
+@pytest.mark.parametrize(
+    "hash_method",
+    (lambda: hashlib.sha256(), _UncopyableHasher),
+    ids=("lambda", "class"),
+)
+def test_memoize_zero_argument_hash_method(app, cache, hash_method):
+    with app.test_request_context():
+
+        @cache.memoize(hash_method=hash_method)
+        def big_foo(a, b):
+            return a + b + random.randrange(0, 100000)
+
+        result = big_foo(5, 2)
+        assert big_foo(5, 2) == result
+        assert big_foo(5, 3) != result
+
+        key = big_foo.make_cache_key(big_foo.uncached, 5, 2)
+        assert cache.get(key) == result
+
+
 def test_memoize_timeout(app):
     app.config["CACHE_DEFAULT_TIMEOUT"] = 1
     cache = Cache(app)
@@ -843,3 +879,57 @@ def test_memoize_function_ignore_kwarg(app, cache):
             return a + b + random.randrange(0, 100000)
 
         assert big_foo(5, 2) == big_foo(5, b=3)
+
+
+def test_function_namespace_instances():
+    class Foo:
+        def bar(self, a):
+            return a
+
+        @classmethod
+        def baz(cls, a):
+            return a
+
+    foo, other = Foo(), Foo()
+    for _ in range(2):
+        # The second round is answered from the cached function info.
+        ns, ins = function_namespace(Foo.bar, args=(foo, 1))
+        assert ns.endswith("Foo.bar")
+        assert ins != function_namespace(Foo.bar, args=(other, 1))[1]
+        assert function_namespace(foo.bar, args=(1,)) == (ns, ins)
+
+        with pytest.raises(ValueError):
+            function_namespace(Foo.baz.__func__, args=(foo, 1))
+
+
+def test_function_namespace_unchanged():
+    class Foo:
+        def __repr__(self):
+            return "Foo(a b)"
+
+        def bar(self):
+            pass
+
+    # Existing cache keys depend on namespaces being used as they are.
+    ns, ins = function_namespace(Foo.bar, args=(Foo(),))
+    assert ns == f"{__name__}.test_function_namespace_unchanged.<locals>.Foo.bar"
+    assert ins == f"{ns}.Foo(a b)"
+
+
+def test_get_arg_names():
+    def foo(a, /, b, c=1, *args, d, **kwargs):
+        e = 2
+        return e
+
+    @functools.wraps(foo)
+    def wrapper(*args, **kwargs):
+        return foo(*args, **kwargs)
+
+    class Foo:
+        def bar(self, a):
+            return a
+
+    assert get_arg_names(foo) == ["b", "c"]
+    assert get_arg_names(wrapper) == ["b", "c"]
+    assert get_arg_names(Foo.bar) == ["self", "a"]
+    assert get_arg_names(Foo().bar) == ["a"]